@@ -0,0 +1,2 @@
+# Present so pytest puts the repository root on sys.path and tests can
+# import the top-level modules (main, observations, dashboard).
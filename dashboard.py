@@ -0,0 +1,374 @@
+import os
+import json
+import html
+import math
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from observations import ObservationStore, StationRingBuffer
+
+# Static HTML dashboard generated from the stored observations.  Each station
+# gets a page with two charts (water level vs. bank, discharge vs. the 2554 /
+# 2565 / 2567 analog years).  Series are stored as one downsampled chunk per
+# station-month under `data/<station_id>/<YYYY-MM>.js`; only the chunks of
+# months that received new samples since the previous build are rewritten, so
+# the bundle can cover years of 10-minute data while each run stays cheap.
+# The bundle has no external dependencies and can be opened from disk or
+# uploaded as a GitHub Actions artifact.
+
+HISTORICAL_CSV = "data/historical_comparison_2554_2565_2567.csv"
+ANALOG_YEARS = ("2554", "2565", "2567")
+MANIFEST_NAME = "manifest.json"
+# Target number of points per series per month after LTTB downsampling
+# (a month of 10-minute samples is ~4,460 points).
+MAX_POINTS_PER_CHUNK = 500
+# Asia/Bangkok has no DST, so month boundaries can use a fixed UTC offset.
+BANGKOK_UTC_OFFSET = 7 * 3600
+CHUNK_PREFIX = "window.DASHBOARD_CHUNKS.push("
+CHUNK_SUFFIX = ");\n"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most `threshold` points of (x, y) that best
+    preserve the visual shape of the series.  The first and last points are
+    always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(points: List[List[float]], threshold: int = MAX_POINTS_PER_CHUNK) -> List[List[float]]:
+    """Apply `lttb` to a list of [timestamp, value] pairs."""
+    if len(points) <= threshold:
+        return points
+    arr = np.asarray(points, dtype=np.float64)
+    return [points[i] for i in lttb(arr[:, 0], arr[:, 1], threshold)]
+
+
+def _month_seconds(month: str) -> int:
+    """Length in seconds of a 'YYYY-MM' month."""
+    start = np.datetime64(month, "M")
+    return int(((start + 1).astype("datetime64[s]") - start.astype("datetime64[s]")).astype(np.int64))
+
+
+def _month_keys(timestamps: np.ndarray) -> np.ndarray:
+    """Local (Asia/Bangkok) 'YYYY-MM' key of each epoch timestamp."""
+    local = (np.asarray(timestamps, dtype=np.int64) + BANGKOK_UTC_OFFSET).astype("datetime64[s]")
+    return local.astype("datetime64[M]").astype(str)
+
+
+def _series(timestamps: np.ndarray, values: np.ndarray) -> List[List[float]]:
+    valid = ~np.isnan(values)
+    return [
+        [int(t), round(float(v), 3)]
+        for t, v in zip(timestamps[valid], values[valid])
+    ]
+
+
+def _read_chunk(path: str) -> Dict[str, object] | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return json.loads(text[len(CHUNK_PREFIX):-len(CHUNK_SUFFIX)])
+    except Exception as e:
+        print(f"⚠️ ไม่สามารถอ่านไฟล์ข้อมูลกราฟ {path}: {e}")
+        return None
+
+
+def _write_chunk(path: str, chunk: Dict[str, object]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(CHUNK_PREFIX + json.dumps(chunk, ensure_ascii=False, separators=(",", ":")) + CHUNK_SUFFIX)
+
+
+def build_month_chunk(buf: StationRingBuffer, month: str, path: str) -> None:
+    """
+    Rebuild the chunk of one station-month from its ring buffer.
+
+    Only the part of the month still held in the buffer is downsampled, from
+    full-resolution samples, with a point budget proportional to the time it
+    spans so the whole month stays around MAX_POINTS_PER_CHUNK.  Points of
+    the existing chunk that are older than the buffer (already evicted from
+    memory) are frozen: they are copied as-is and never downsampled again,
+    so a month is neither truncated by the buffer capacity nor thinned
+    further on every rebuild.
+    """
+    window = buf.window()
+    in_month = _month_keys(window.timestamp) == month
+    ts = window.timestamp[in_month]
+    budget = MAX_POINTS_PER_CHUNK
+    if len(ts) > 1:
+        budget = max(3, math.ceil(MAX_POINTS_PER_CHUNK * int(ts[-1] - ts[0]) / _month_seconds(month)))
+    chunk = {
+        "month": month,
+        "level": downsample(_series(ts, window.level[in_month]), budget),
+        "discharge": downsample(_series(ts, window.discharge[in_month]), budget),
+    }
+    previous = _read_chunk(path)
+    if previous is not None and len(window.timestamp):
+        buffer_start = int(window.timestamp[0])
+        for key in ("level", "discharge"):
+            frozen = [p for p in previous.get(key, []) if p[0] < buffer_start]
+            chunk[key] = frozen + chunk[key]
+    _write_chunk(path, chunk)
+
+
+def load_analog_years(csv_path: str = HISTORICAL_CSV) -> Dict[str, List[List[float]]]:
+    """
+    Read the analog-year discharges as {year: [[day, month, value], ...]}.
+    Returns an empty dict if the CSV is unavailable.
+    """
+    try:
+        if not os.path.exists(csv_path):
+            print(f"⚠️ ไม่พบไฟล์ข้อมูลย้อนหลัง (CSV) ที่: {csv_path}")
+            return {}
+        df = pd.read_csv(csv_path)
+        analog: Dict[str, List[List[float]]] = {}
+        for year in ANALOG_YEARS:
+            if year not in df.columns:
+                continue
+            rows = df[["day_month", year]].dropna()
+            analog[year] = [
+                [int(dm[:2]), int(dm[3:5]), float(v)]
+                for dm, v in zip(rows["day_month"], rows[year])
+            ]
+        return analog
+    except Exception as e:
+        print(f"❌ ERROR: ไม่สามารถโหลดข้อมูลย้อนหลังจาก CSV ได้ ({csv_path}): {e}")
+        return {}
+
+
+def build_dashboard(
+    store: ObservationStore,
+    out_dir: str = "dashboard",
+    csv_path: str = HISTORICAL_CSV,
+) -> int:
+    """
+    Incrementally (re)build the static dashboard in `out_dir`.
+
+    A manifest records, per station, the newest timestamp already rendered.
+    Only stations with newer samples in `store` are processed, and for those
+    only the months containing the new samples are rebuilt.  The index page
+    is regenerated on every call.
+
+    Returns
+    -------
+    int
+        The number of stations whose pages were rebuilt.
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest: Dict[str, Dict[str, object]] = {}
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"⚠️ ไม่สามารถอ่าน manifest ของแดชบอร์ด ({manifest_path}), สร้างใหม่ทั้งหมด: {e}")
+    os.makedirs(os.path.join(out_dir, "stations"), exist_ok=True)
+    analog_json = json.dumps(load_analog_years(csv_path), separators=(",", ":"))
+    rebuilt = 0
+    for station_id, buf in store.buffers.items():
+        last = buf.last_timestamp
+        entry = manifest.get(str(station_id), {})
+        if last is None or last <= entry.get("rendered_until", 0):
+            continue
+        new = buf.since(entry.get("rendered_until", 0))
+        chunk_dir = os.path.join(out_dir, "data", str(station_id))
+        os.makedirs(chunk_dir, exist_ok=True)
+        months = sorted(set(entry.get("months", [])))
+        for month in np.unique(_month_keys(new.timestamp)):
+            build_month_chunk(buf, str(month), os.path.join(chunk_dir, f"{month}.js"))
+            if month not in months:
+                months.append(str(month))
+        months.sort()
+        meta = store.meta.get(station_id)
+        latest = buf.window(1)
+        entry = {
+            "label": meta.label if meta is not None else str(station_id),
+            "bank_level": meta.bank_level if meta is not None and not math.isnan(meta.bank_level) else None,
+            "rendered_until": last,
+            "months": months,
+            "level": None if np.isnan(latest.level[0]) else round(float(latest.level[0]), 2),
+            "discharge": None if np.isnan(latest.discharge[0]) else round(float(latest.discharge[0]), 1),
+            "alert": int(latest.flags[0]),
+        }
+        manifest[str(station_id)] = entry
+        with open(os.path.join(out_dir, "stations", f"{station_id}.html"), "w", encoding="utf-8") as f:
+            f.write(_render_station_page(station_id, entry, analog_json))
+        rebuilt += 1
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(_render_index(manifest))
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    print(f"✅ สร้างแดชบอร์ดใหม่ {rebuilt} สถานี (ทั้งหมด {len(manifest)} สถานี) ที่ {out_dir}")
+    return rebuilt
+
+
+# --- HTML templates ---
+
+_STYLE = """
+body{font-family:sans-serif;margin:1.5em;color:#222}
+table{border-collapse:collapse}td,th{padding:4px 10px;border-bottom:1px solid #ddd;text-align:left}
+.chart{margin:1em 0}.legend span{margin-right:1em}
+"""
+
+_CHART_JS = """
+function drawChart(el, series, yLabel) {
+  const W = 900, H = 320, L = 60, R = 20, T = 20, B = 40;
+  const pts = series.flatMap(s => s.points);
+  if (!pts.length) { el.textContent = 'ไม่มีข้อมูล'; return; }
+  let tMin = Infinity, tMax = -Infinity, vMin = Infinity, vMax = -Infinity;
+  for (const [t, v] of pts) {
+    tMin = Math.min(tMin, t); tMax = Math.max(tMax, t);
+    vMin = Math.min(vMin, v); vMax = Math.max(vMax, v);
+  }
+  if (vMax === vMin) { vMax += 1; vMin -= 1; }
+  const x = t => L + (tMax === tMin ? 0 : (t - tMin) / (tMax - tMin)) * (W - L - R);
+  const y = v => T + (1 - (v - vMin) / (vMax - vMin)) * (H - T - B);
+  const day = t => new Date((t + 7 * 3600) * 1000).toISOString().slice(0, 10);
+  let svg = `<svg viewBox="0 0 ${W} ${H}" width="100%" style="max-width:${W}px">`;
+  svg += `<line x1="${L}" y1="${H - B}" x2="${W - R}" y2="${H - B}" stroke="#999"/>`;
+  svg += `<line x1="${L}" y1="${T}" x2="${L}" y2="${H - B}" stroke="#999"/>`;
+  svg += `<text x="${L - 5}" y="${T + 4}" font-size="11" text-anchor="end">${vMax.toFixed(1)}</text>`;
+  svg += `<text x="${L - 5}" y="${H - B}" font-size="11" text-anchor="end">${vMin.toFixed(1)}</text>`;
+  svg += `<text x="${L}" y="${H - B + 16}" font-size="11">${day(tMin)}</text>`;
+  svg += `<text x="${W - R}" y="${H - B + 16}" font-size="11" text-anchor="end">${day(tMax)}</text>`;
+  svg += `<text x="12" y="${T + (H - T - B) / 2}" font-size="11" transform="rotate(-90 12 ${T + (H - T - B) / 2})" text-anchor="middle">${yLabel}</text>`;
+  for (const s of series) {
+    if (!s.points.length) continue;
+    const d = s.points.map(p => `${x(p[0]).toFixed(1)},${y(p[1]).toFixed(1)}`).join(' ');
+    svg += `<polyline fill="none" stroke="${s.color}" stroke-width="1.5" ${s.dash ? 'stroke-dasharray="5,4"' : ''} points="${d}"/>`;
+  }
+  svg += '</svg><div class="legend">' + series.map(s => `<span style="color:${s.color}">■ ${s.name}</span>`).join('') + '</div>';
+  el.innerHTML = svg;
+}
+
+function analogSeries(analog, tMin, tMax) {
+  const colors = {'2554': '#d62728', '2565': '#ff7f0e', '2567': '#9467bd'};
+  const first = new Date((tMin + 7 * 3600) * 1000).getUTCFullYear();
+  const last = new Date((tMax + 7 * 3600) * 1000).getUTCFullYear();
+  return Object.keys(analog).map(year => {
+    const points = [];
+    for (let yr = first; yr <= last; yr++) {
+      for (const [d, m, v] of analog[year]) {
+        const t = Date.UTC(yr, m - 1, d) / 1000 - 7 * 3600;
+        if (t >= tMin && t <= tMax) points.push([t, v]);
+      }
+    }
+    points.sort((a, b) => a[0] - b[0]);
+    return {name: `ปี ${year}`, color: colors[year] || '#777', dash: true, points};
+  });
+}
+
+function renderStation(bankLevel, analog) {
+  const chunks = window.DASHBOARD_CHUNKS.slice().sort((a, b) => a.month.localeCompare(b.month));
+  const level = chunks.flatMap(c => c.level), discharge = chunks.flatMap(c => c.discharge);
+  const levelSeries = [{name: 'ระดับน้ำ (ม.รทก.)', color: '#1f77b4', points: level}];
+  if (bankLevel !== null && level.length) {
+    levelSeries.push({name: 'ตลิ่ง', color: '#2ca02c', dash: true,
+      points: [[level[0][0], bankLevel], [level[level.length - 1][0], bankLevel]]});
+  }
+  drawChart(document.getElementById('level'), levelSeries, 'ม.รทก.');
+  const dischargeEl = document.getElementById('discharge');
+  if (!discharge.length) { dischargeEl.textContent = 'สถานีนี้ไม่มีข้อมูลปริมาณน้ำ'; return; }
+  const tMin = discharge[0][0], tMax = discharge[discharge.length - 1][0];
+  drawChart(dischargeEl,
+    [{name: 'ปริมาณน้ำ (ลบ.ม./วินาที)', color: '#1f77b4', points: discharge}, ...analogSeries(analog, tMin, tMax)],
+    'ลบ.ม./วินาที');
+}
+"""
+
+# Alert flags as stored by main.py (ALERT_NORMAL/WATCH/CRITICAL/UNKNOWN).
+_ALERT_ICONS = {0: "🟩", 1: "🟨", 2: "🟥", 3: "⬜"}
+# Index order: critical first, stations with an unknown bank level last.
+_ALERT_RANK = {2: 0, 1: 1, 0: 2, 3: 3}
+
+
+def _render_station_page(station_id: int, entry: Dict[str, object], analog_json: str) -> str:
+    label = html.escape(entry["label"])
+    scripts = "\n".join(
+        f'<script src="../data/{station_id}/{month}.js"></script>' for month in entry["months"]
+    )
+    bank = "null" if entry["bank_level"] is None else json.dumps(entry["bank_level"])
+    return f"""<!DOCTYPE html>
+<html lang="th"><head><meta charset="utf-8"><title>{label}</title><style>{_STYLE}</style></head>
+<body>
+<p><a href="../index.html">← ทุกสถานี</a></p>
+<h1>{label}</h1>
+<h2>🌊 ระดับน้ำ + ตลิ่ง</h2><div id="level" class="chart"></div>
+<h2>💧 ปริมาณน้ำ เทียบปี 2554 / 2565 / 2567</h2><div id="discharge" class="chart"></div>
+<script>window.DASHBOARD_CHUNKS = [];</script>
+{scripts}
+<script>{_CHART_JS}
+renderStation({bank}, {analog_json});
+</script>
+</body></html>
+"""
+
+
+def _render_index(manifest: Dict[str, Dict[str, object]]) -> str:
+    def sort_key(item):
+        entry = item[1]
+        rank = _ALERT_RANK.get(entry["alert"], len(_ALERT_RANK))
+        if entry["level"] is None or entry["bank_level"] is None:
+            return (rank, math.inf)
+        return (rank, entry["bank_level"] - entry["level"])
+
+    rows = []
+    for station_id, entry in sorted(manifest.items(), key=sort_key):
+        distance = (
+            f"{entry['bank_level'] - entry['level']:.2f}"
+            if entry["level"] is not None and entry["bank_level"] is not None
+            else "-"
+        )
+        updated = datetime.fromtimestamp(entry["rendered_until"], pytz.timezone("Asia/Bangkok"))
+        rows.append(
+            f"<tr><td>{_ALERT_ICONS.get(entry['alert'], '')}</td>"
+            f'<td><a href="stations/{station_id}.html">{html.escape(entry["label"])}</a></td>'
+            f"<td>{'-' if entry['level'] is None else entry['level']}</td>"
+            f"<td>{'-' if entry['bank_level'] is None else entry['bank_level']}</td>"
+            f"<td>{distance}</td>"
+            f"<td>{'-' if entry['discharge'] is None else entry['discharge']}</td>"
+            f"<td>{updated.strftime('%d/%m/%Y %H:%M')}</td></tr>"
+        )
+    now = datetime.now(pytz.timezone("Asia/Bangkok"))
+    return f"""<!DOCTYPE html>
+<html lang="th"><head><meta charset="utf-8"><title>แดชบอร์ดระดับน้ำ</title><style>{_STYLE}</style></head>
+<body>
+<h1>แดชบอร์ดระดับน้ำ</h1>
+<p>🗓️ สร้างเมื่อ: {now.strftime('%d/%m/%Y %H:%M')} น.</p>
+<table>
+<tr><th></th><th>สถานี</th><th>ระดับน้ำ (ม.รทก.)</th><th>ตลิ่ง (ม.รทก.)</th><th>ห่างตลิ่ง (ม.)</th><th>ปริมาณน้ำ (ลบ.ม./วินาที)</th><th>ข้อมูลล่าสุด</th></tr>
+{"".join(rows)}
+</table>
+</body></html>
+"""
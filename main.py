@@ -4,12 +4,18 @@ import json
 import time
 import random
 import requests
+import math
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 import pytz
 import pandas as pd
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from bs4 import BeautifulSoup
 
+from observations import Observation, ObservationStore, StationMeta, level_trend
+from dashboard import build_dashboard
+
 # We will integrate a second weather source (OpenWeather) for more
 # descriptive alerts about today's conditions.  The following
 # constants and helper function are adapted from the original
@@ -178,6 +184,46 @@ MUNICIPALITY_NAME = os.environ.get('MUNICIPALITY_NAME', 'เทศบาลต
 DAM_PROVINCE_CODE = os.environ.get('DAM_PROVINCE_CODE', '18')
 DAM_STATION_OLDCODE = os.environ.get('DAM_STATION_OLDCODE', 'C.13')
 
+# --- โหมดตรวจสอบทั่วประเทศ (Nationwide sharded polling) ---
+# ตั้งค่า NATIONWIDE_MODE=1 เพื่อดึงข้อมูลทุกสถานีโทรมาตรของ Thaiwater ใน 77 จังหวัด
+# แทนการตรวจสอบสถานีเดียว จังหวัดจะถูกแบ่งเป็น shard ให้ process pool ประมวลผลพร้อมกัน
+# จำนวน worker กำหนดได้ผ่าน SHARD_WORKERS (ค่าเริ่มต้น = จำนวน CPU)
+THAIWATER_WATERLEVEL_API = (
+    "https://api-v3.thaiwater.net/api/v1/thaiwater30/public/waterlevel?province_code={code}"
+)
+NATIONWIDE_MODE = os.environ.get('NATIONWIDE_MODE', '').strip().lower() in {'1', 'true', 'yes'}
+SHARD_WORKERS = os.environ.get('SHARD_WORKERS')
+# รหัสจังหวัด (มอก. 1099) ทั้ง 77 จังหวัด
+PROVINCE_CODES = tuple(
+    str(code) for code in (
+        *range(10, 20), *range(20, 28), *range(30, 50), *range(50, 59),
+        *range(60, 68), *range(70, 78), *range(80, 87), *range(90, 97),
+    )
+)
+# ระดับการแจ้งเตือนของแต่ละสถานี (ใช้เกณฑ์ระยะห่างจากตลิ่งเดียวกับ analyze_and_create_message)
+ALERT_NORMAL = 0
+ALERT_WATCH = 1
+ALERT_CRITICAL = 2
+# สถานีที่ API ไม่มีข้อมูลระดับตลิ่ง (min_bank) จึงประเมินระยะห่างจากตลิ่งไม่ได้
+ALERT_UNKNOWN = 3
+CRITICAL_DISTANCE_TO_BANK = 1.0
+WATCH_DISTANCE_TO_BANK = 2.0
+# เกณฑ์ปริมาณน้ำปล่อยเขื่อนเจ้าพระยา (ลบ.ม./วินาที) ที่ยกระดับการแจ้งเตือนของสถานีหลัก
+DAM_CRITICAL_DISCHARGE = 2400
+DAM_WATCH_DISCHARGE = 1800
+# จำนวนสถานีสูงสุดที่แสดงในข้อความ LINE (ข้อความ LINE จำกัดที่ 5,000 ตัวอักษร)
+NATIONWIDE_MAX_LISTED = 20
+
+# --- ข้อมูลย้อนหลังและแดชบอร์ด ---
+# ค่าที่ตรวจวัดได้ในแต่ละรอบจะถูกเก็บไว้ที่ OBSERVATIONS_DIR และใช้สร้างแดชบอร์ด HTML
+# ที่ DASHBOARD_DIR (สร้างใหม่เฉพาะสถานี/เดือนที่มีข้อมูลใหม่)
+OBSERVATIONS_DIR = os.environ.get('OBSERVATIONS_DIR', 'observations')
+DASHBOARD_DIR = os.environ.get('DASHBOARD_DIR', 'dashboard')
+# รหัสสถานีสำรองสำหรับสถานีหลัก (โหมดปกติ) กรณีที่ API ไม่ส่งรหัสสถานีมา
+LOCAL_STATION_ID = 0
+# รหัสที่สงวนไว้สำหรับอนุกรมปริมาณน้ำปล่อยเขื่อนเจ้าพระยา (แยกจากสถานีวัดระดับน้ำ)
+DAM_SERIES_ID = -1
+
 # -- อ่านข้อมูลย้อนหลังจาก Excel --
 THAI_MONTHS = {
     'มกราคม':1, 'กุมภาพันธ์':2, 'มีนาคม':3, 'เมษายน':4,
@@ -319,36 +365,42 @@ def get_sapphaya_data(
     target_station_name: str = "อินทร์บุรี",
     timeout: int = 15,
     retries: int = 3,
-):
-    api_url_template = (
-        "https://api-v3.thaiwater.net/api/v1/thaiwater30/public/waterlevel?province_code={code}"
-    )
+) -> Tuple[StationMeta, Observation] | Tuple[None, None]:
+    """
+    Fetch the latest reading of the configured station from the Thaiwater API.
+
+    Only the water level is required for the alert.  The observation time
+    falls back to the poll time when the API omits `waterlevel_datetime`,
+    and is None when the value cannot be parsed (the reading is then still
+    alerted on, but not stored).
+
+    Returns
+    -------
+    tuple
+        (StationMeta, Observation) for the matching station, or (None, None)
+        if it could not be found or has no water level.
+    """
     for attempt in range(retries):
         try:
-            url = api_url_template.format(code=province_code)
-            headers = {
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/91.0.4472.124 Safari/537.36"
-                ),
-            }
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            data = response.json().get("data", [])
+            data = fetch_province_waterlevels(province_code, timeout=timeout, retries=1)
             for item in data:
                 geocode = item.get("geocode", {})
                 tumbon_name = geocode.get("tumbon_name", {}).get("th", "")
                 station_info = item.get("station", {})
                 station_name = station_info.get("tele_station_name", {}).get("th", "")
                 if tumbon_name == target_tumbon and station_name == target_station_name:
-                    wl_str = item.get("waterlevel_msl")
-                    water_level = None
-                    if wl_str is not None:
-                        try:
-                            water_level = float(wl_str)
-                        except ValueError:
-                            water_level = None
+                    water_level = _to_float(item.get("waterlevel_msl"))
+                    if water_level is None:
+                        print(
+                            f"⚠️ ข้อมูลระดับน้ำสถานี '{target_station_name}' ไม่ถูกต้อง ('{item.get('waterlevel_msl')}')"
+                        )
+                        break
+                    datetime_str = item.get("waterlevel_datetime")
+                    timestamp = _to_epoch(datetime_str) if datetime_str else int(time.time())
+                    if timestamp is None:
+                        print(
+                            f"⚠️ อ่านเวลาข้อมูลสถานี '{target_station_name}' ไม่ได้ ('{datetime_str}') จะไม่บันทึกข้อมูลนี้ลงแดชบอร์ด"
+                        )
                     # Bank height (ตลิ่ง) may be overridden via environment variable "BANK_HEIGHT".
                     # If set, use that value; otherwise fall back to 13 (fixed for อินทร์บุรี per user request).
                     env_bank_height = os.environ.get("BANK_HEIGHT")
@@ -366,7 +418,14 @@ def get_sapphaya_data(
                     print(
                         f"✅ พบข้อมูลสถานีอินทร์บุรี: ระดับน้ำ={water_level}, ระดับตลิ่ง={bank_level} (ใช้ค่า {default_bank})"
                     )
-                    return water_level, bank_level
+                    meta = StationMeta(
+                        station_id=int(station_info.get("id") or LOCAL_STATION_ID),
+                        name=station_name,
+                        province=geocode.get("province_name", {}).get("th", "") or STATION_PROVINCE,
+                        oldcode=station_info.get("tele_station_oldcode") or "",
+                        bank_level=bank_level,
+                    )
+                    return meta, Observation(timestamp=timestamp, level=water_level)
             print(
                 f"⚠️ ไม่พบข้อมูลสถานี '{target_station_name}' ที่ {target_tumbon} ในการเรียก API ครั้งที่ {attempt + 1}"
             )
@@ -413,22 +472,9 @@ def fetch_chao_phraya_dam_discharge(
     """
     # First attempt to fetch via API if province_code is provided
     if province_code:
-        api_url_template = (
-            "https://api-v3.thaiwater.net/api/v1/thaiwater30/public/waterlevel?province_code={code}"
-        )
         for attempt in range(retries):
             try:
-                url_api = api_url_template.format(code=province_code)
-                headers = {
-                    "User-Agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/91.0.4472.124 Safari/537.36"
-                    ),
-                }
-                resp = requests.get(url_api, headers=headers, timeout=timeout)
-                resp.raise_for_status()
-                data = resp.json().get("data", [])
+                data = fetch_province_waterlevels(province_code, timeout=timeout, retries=1)
                 for item in data:
                     station = item.get("station", {})
                     oldcode = station.get("tele_station_oldcode")
@@ -485,10 +531,216 @@ def fetch_chao_phraya_dam_discharge(
             print(f"❌ ERROR: fetch_chao_phraya_dam_discharge (scrape): {e}")
     return None
 
+def _to_float(value) -> float | None:
+    """Convert an API value (number or numeric string) to float, or None."""
+    if value is None:
+        return None
+    try:
+        result = float(str(value).replace(',', ''))
+    except ValueError:
+        return None
+    return None if math.isnan(result) else result
+
+def _to_epoch(value: str | None, timezone: str = "Asia/Bangkok") -> int | None:
+    """Convert a Thaiwater 'YYYY-MM-DD HH:MM' timestamp to epoch seconds, or None."""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return int(pytz.timezone(timezone).localize(parsed).timestamp())
+    return None
+
+def classify_station(water_level: float, bank_level: float) -> int:
+    """
+    Classify a station by how far the water level is below the river bank,
+    using the same distance thresholds as `analyze_and_create_message`.
+
+    Returns
+    -------
+    int
+        ALERT_CRITICAL (< 1 m), ALERT_WATCH (< 2 m), ALERT_NORMAL, or
+        ALERT_UNKNOWN if the bank level is not known (NaN).
+    """
+    if math.isnan(bank_level):
+        return ALERT_UNKNOWN
+    distance_to_bank = bank_level - water_level
+    if distance_to_bank < CRITICAL_DISTANCE_TO_BANK:
+        return ALERT_CRITICAL
+    if distance_to_bank < WATCH_DISTANCE_TO_BANK:
+        return ALERT_WATCH
+    return ALERT_NORMAL
+
+def classify_dam_discharge(dam_discharge: float) -> int:
+    """Alert level implied by the Chao Phraya dam discharge alone (m³/s)."""
+    if dam_discharge > DAM_CRITICAL_DISCHARGE:
+        return ALERT_CRITICAL
+    if dam_discharge > DAM_WATCH_DISCHARGE:
+        return ALERT_WATCH
+    return ALERT_NORMAL
+
+def classify_local_station(water_level: float, bank_level: float, dam_discharge: float | None) -> int:
+    """
+    Alert level of the configured station: `classify_station`, raised to
+    ALERT_CRITICAL / ALERT_WATCH when the Chao Phraya dam discharge exceeds
+    DAM_CRITICAL_DISCHARGE / DAM_WATCH_DISCHARGE.  Used for both the LINE
+    message and the flag stored for the dashboard.
+    """
+    alert = classify_station(water_level, bank_level)
+    if dam_discharge is None or alert == ALERT_CRITICAL:
+        return alert
+    dam_alert = classify_dam_discharge(dam_discharge)
+    return alert if dam_alert == ALERT_NORMAL else dam_alert
+
+def fetch_province_waterlevels(
+    province_code: str,
+    timeout: int = 15,
+    retries: int = 2,
+) -> list:
+    """
+    Fetch the raw water level records of every tele station in a province
+    from the Thaiwater API.  Returns an empty list if all retries fail.
+    """
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/91.0.4472.124 Safari/537.36"
+        ),
+    }
+    for attempt in range(retries):
+        try:
+            url = THAIWATER_WATERLEVEL_API.format(code=province_code)
+            response = requests.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            return response.json().get("data", [])
+        except Exception as e:
+            print(f"❌ ERROR: fetch_province_waterlevels จังหวัด {province_code} (ครั้งที่ {attempt + 1}): {e}")
+        if attempt < retries - 1:
+            time.sleep(3)
+    return []
+
+def poll_province_shard(province_codes: Tuple[str, ...]) -> Dict[str, object]:
+    """
+    Worker entry point for sharded polling: fetch, parse and classify every
+    station in the given provinces.
+
+    The result is columnar (one typed `array` per field) so that it pickles
+    back to the aggregator as a few compact buffers instead of thousands of
+    dicts.  Station metadata is returned as slotted `StationMeta` records.
+
+    Returns
+    -------
+    dict
+        Keys 'station_id', 'timestamp', 'water_level', 'bank_level',
+        'discharge', 'alert' (parallel arrays) and 'stations'
+        (station_id -> StationMeta).
+    """
+    station_ids = array('q')
+    timestamps = array('q')
+    water_levels = array('d')
+    bank_levels = array('d')
+    discharges = array('d')
+    alerts = array('b')
+    stations: Dict[int, StationMeta] = {}
+    for code in province_codes:
+        for item in fetch_province_waterlevels(code):
+            station = item.get("station", {})
+            station_id = station.get("id")
+            water_level = _to_float(item.get("waterlevel_msl"))
+            # Stations without a bank level are kept (bank NaN, ALERT_UNKNOWN)
+            # so they are still counted, stored and shown on the dashboard.
+            bank_level = _to_float(station.get("min_bank"))
+            if bank_level is None:
+                bank_level = math.nan
+            timestamp = _to_epoch(item.get("waterlevel_datetime"))
+            if station_id is None or water_level is None or timestamp is None:
+                continue
+            discharge = _to_float(item.get("discharge"))
+            alert = classify_station(water_level, bank_level)
+            station_ids.append(int(station_id))
+            timestamps.append(timestamp)
+            water_levels.append(water_level)
+            bank_levels.append(bank_level)
+            discharges.append(math.nan if discharge is None else discharge)
+            alerts.append(alert)
+            geocode = item.get("geocode", {})
+            stations[int(station_id)] = StationMeta(
+                station_id=int(station_id),
+                name=station.get("tele_station_name", {}).get("th", ""),
+                province=geocode.get("province_name", {}).get("th", ""),
+                oldcode=station.get("tele_station_oldcode") or "",
+                bank_level=bank_level,
+            )
+    return {
+        "station_id": station_ids,
+        "timestamp": timestamps,
+        "water_level": water_levels,
+        "bank_level": bank_levels,
+        "discharge": discharges,
+        "alert": alerts,
+        "stations": stations,
+    }
+
+def merge_shard_results(results: List[Dict[str, object]]) -> Dict[str, object]:
+    """
+    Aggregate columnar shard results into a single columnar result.  A
+    station reported more than once (e.g. by neighbouring provinces) is
+    de-duplicated, keeping its most recent observation.
+    """
+    latest: Dict[int, Tuple[int, int]] = {}
+    for shard_index, shard in enumerate(results):
+        for row, (station_id, ts) in enumerate(zip(shard["station_id"], shard["timestamp"])):
+            current = latest.get(station_id)
+            if current is None or ts > results[current[0]]["timestamp"][current[1]]:
+                latest[station_id] = (shard_index, row)
+    merged = {
+        "station_id": array('q'),
+        "timestamp": array('q'),
+        "water_level": array('d'),
+        "bank_level": array('d'),
+        "discharge": array('d'),
+        "alert": array('b'),
+        "stations": {},
+    }
+    columns = ("station_id", "timestamp", "water_level", "bank_level", "discharge", "alert")
+    for station_id, (shard_index, row) in latest.items():
+        shard = results[shard_index]
+        for column in columns:
+            merged[column].append(shard[column][row])
+        merged["stations"][station_id] = shard["stations"][station_id]
+    return merged
+
+def run_sharded_poll(
+    province_codes: Tuple[str, ...] = PROVINCE_CODES,
+    workers: int | None = None,
+) -> Dict[str, object]:
+    """
+    Poll every station in `province_codes` using a process pool.  Provinces
+    are dealt round-robin into one shard per worker so that large and small
+    provinces are spread evenly; each worker fetches, parses and classifies
+    its shard and the results are merged here.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(province_codes)))
+    shards = [tuple(province_codes[i::workers]) for i in range(workers)]
+    print(f"🌐 เริ่มดึงข้อมูล {len(province_codes)} จังหวัด ด้วย {workers} process")
+    if workers == 1:
+        results = [poll_province_shard(shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(poll_province_shard, shards))
+    merged = merge_shard_results(results)
+    print(f"✅ ได้ข้อมูลทั้งหมด {len(merged['station_id'])} สถานี")
+    return merged
+
 def analyze_and_create_message(
-    water_level: float,
+    meta: StationMeta,
+    observation: Observation,
     dam_discharge: float,
-    bank_height: float,
     hist_2567: int | None = None,
     hist_2565: int | None = None,
     hist_2554: int | None = None,
@@ -502,9 +754,12 @@ def analyze_and_create_message(
     message will include location details (พื้นที่, สถานี, ตำบล/อำเภอ/จังหวัด),
     current measurements, historical comparisons, and guidance.
     """
+    water_level = observation.level
+    bank_height = meta.bank_level
     distance_to_bank = bank_height - water_level
-    # Determine alert level
-    if dam_discharge is not None and (dam_discharge > 2400 or distance_to_bank < 1.0):
+    # Determine alert level from the bank distance and the dam discharge
+    alert = classify_local_station(water_level, bank_height, dam_discharge)
+    if alert == ALERT_CRITICAL:
         ICON = "🟥"
         HEADER = "‼️ ประกาศเตือนภัยระดับสูงสุด ‼️"
         summary_lines = [
@@ -513,7 +768,7 @@ def analyze_and_create_message(
             "2. ขนย้ายทรัพย์สินขึ้นที่สูงโดยด่วน",
             "3. งดใช้เส้นทางสัญจรริมแม่น้ำ",
         ]
-    elif dam_discharge is not None and (dam_discharge > 1800 or distance_to_bank < 2.0):
+    elif alert == ALERT_WATCH:
         ICON = "🟨"
         HEADER = "‼️ ประกาศเฝ้าระวัง ‼️"
         summary_lines = [
@@ -577,6 +832,130 @@ def create_error_message(station_status: str, discharge_status: str) -> str:
         f"กรุณาตรวจสอบ Log บน GitHub Actions เพื่อดูรายละเอียดข้อผิดพลาดครับ"
     )
 
+def create_nationwide_message(
+    merged: Dict[str, object],
+    store: ObservationStore | None = None,
+    max_listed: int = NATIONWIDE_MAX_LISTED,
+) -> str:
+    """
+    Compose a nationwide summary from the merged sharded-poll result: counts
+    per alert level, followed by the stations closest to overflowing their
+    banks (at most `max_listed`, to stay within LINE's message size limit).
+    If an observation store is given, each listed station also shows its
+    water level trend between its last two stored samples, together with
+    the time between them (the polling interval depends on the schedule).
+    """
+    alerts = merged["alert"]
+    n_critical = sum(1 for a in alerts if a == ALERT_CRITICAL)
+    n_watch = sum(1 for a in alerts if a == ALERT_WATCH)
+    n_unknown = sum(1 for a in alerts if a == ALERT_UNKNOWN)
+    now = datetime.now(pytz.timezone("Asia/Bangkok"))
+    if n_critical:
+        header = "🟥 ‼️ ประกาศเตือนภัยระดับสูงสุด ‼️"
+    elif n_watch:
+        header = "🟨 ‼️ ประกาศเฝ้าระวัง ‼️"
+    else:
+        header = "🟩 สถานะปกติ"
+    msg_lines: List[str] = [
+        f"{header}",
+        "📍 สถานีโทรมาตรทั่วประเทศ",
+        f"🗓️ วันที่: {now.strftime('%d/%m/%Y %H:%M')} น.",
+        "",
+        f"📡 จำนวนสถานีที่มีข้อมูล: {len(alerts):,} สถานี",
+        f"• 🟥 วิกฤต (ห่างตลิ่ง < 1 ม.): {n_critical:,} สถานี",
+        f"• 🟨 เฝ้าระวัง (ห่างตลิ่ง < 2 ม.): {n_watch:,} สถานี",
+        f"• ⬜ ไม่มีข้อมูลระดับตลิ่ง: {n_unknown:,} สถานี",
+    ]
+    flagged = [
+        (merged["bank_level"][i] - merged["water_level"][i], i)
+        for i, a in enumerate(alerts)
+        if a in (ALERT_WATCH, ALERT_CRITICAL)
+    ]
+    flagged.sort()
+    if flagged:
+        msg_lines.append("")
+        msg_lines.append("🌊 สถานีที่ระดับน้ำใกล้ตลิ่งที่สุด")
+        for distance_to_bank, i in flagged[:max_listed]:
+            icon = "🟥" if alerts[i] == ALERT_CRITICAL else "🟨"
+            station_id = merged["station_id"][i]
+            meta = merged["stations"].get(station_id)
+            label = meta.label if meta is not None else str(station_id)
+            line = f"{icon} {label}: ต่ำกว่าตลิ่ง {distance_to_bank:.2f} ม."
+            buf = store.buffers.get(station_id) if store is not None else None
+            if buf is not None:
+                last_two = buf.window(2)
+                trend = level_trend(last_two)
+                if not math.isnan(trend):
+                    arrow = "⬆️" if trend > 0 else "⬇️"
+                    span_hours = (last_two.timestamp[-1] - last_two.timestamp[0]) / 3600
+                    line += f" {arrow} {trend:+.2f} ม./ชม. (ช่วง {span_hours:.1f} ชม.)"
+            msg_lines.append(line)
+        if len(flagged) > max_listed:
+            msg_lines.append(f"... และอีก {len(flagged) - max_listed:,} สถานี")
+    return "\n".join(msg_lines)
+
+def record_local_observation(
+    store: ObservationStore,
+    meta: StationMeta,
+    observation: Observation,
+    dam_discharge: float | None,
+) -> bool:
+    """
+    Store the configured station's reading at its own observation time so it
+    appears on the dashboard.  The flag is the combined bank/dam alert of the
+    LINE message; the dam discharge itself is kept in its own series (see
+    `record_dam_discharge`).  A reading without a usable timestamp, or one that is not newer than the
+    stored one (the API has not updated since the last run), is not stored.
+
+    Returns
+    -------
+    bool
+        True if the reading was stored.
+    """
+    if observation.timestamp is None:
+        return False
+    store.meta[meta.station_id] = meta
+    return store.append(
+        meta.station_id,
+        observation.timestamp,
+        observation.level,
+        flags=classify_local_station(observation.level, meta.bank_level, dam_discharge),
+    )
+
+def record_dam_discharge(store: ObservationStore, dam_discharge: float, timestamp: int) -> bool:
+    """
+    Store the Chao Phraya dam discharge under DAM_SERIES_ID.  The dam
+    sources carry no observation time, so the caller passes the poll time.
+
+    Returns
+    -------
+    bool
+        True if the value was stored.
+    """
+    store.meta[DAM_SERIES_ID] = StationMeta(
+        station_id=DAM_SERIES_ID,
+        name=f"เขื่อนเจ้าพระยา ({DAM_STATION_OLDCODE})",
+        province="",
+        oldcode=DAM_STATION_OLDCODE,
+        bank_level=math.nan,
+    )
+    return store.append(
+        DAM_SERIES_ID,
+        timestamp,
+        math.nan,
+        dam_discharge,
+        classify_dam_discharge(dam_discharge),
+    )
+
+def update_dashboard(store: ObservationStore) -> None:
+    """Persist new observations and incrementally rebuild the dashboard."""
+    try:
+        written = store.save(OBSERVATIONS_DIR)
+        print(f"✅ บันทึกข้อมูล {written} สถานีที่ {OBSERVATIONS_DIR}")
+        build_dashboard(store, DASHBOARD_DIR)
+    except Exception as e:
+        print(f"❌ ERROR: update_dashboard: {e}")
+
 def send_line_broadcast(message):
     if not LINE_TOKEN:
         print("❌ ไม่พบ LINE_CHANNEL_ACCESS_TOKEN!")
@@ -593,14 +972,31 @@ def send_line_broadcast(message):
     except Exception as e:
         print(f"❌ ERROR: LINE Broadcast: {e}")
 
-if __name__ == "__main__":
-    print("=== เริ่มการทำงานระบบแจ้งเตือนน้ำ (เวอร์ชันปรับปรุง) ===")
-    
-    # --- Fetch Core Data ---
+def run_nationwide() -> Tuple[str, ObservationStore]:
+    """
+    Poll every Thaiwater station across all provinces with a process pool
+    and build a single aggregated summary message.
+    """
+    workers = None
+    if SHARD_WORKERS:
+        try:
+            workers = int(SHARD_WORKERS)
+        except ValueError:
+            print(f"⚠️ ค่า SHARD_WORKERS ไม่ถูกต้อง ('{SHARD_WORKERS}'), ใช้จำนวน CPU แทน")
+    merged = run_sharded_poll(PROVINCE_CODES, workers=workers)
+    store = ObservationStore.load(OBSERVATIONS_DIR)
+    store.ingest(merged)
+    return create_nationwide_message(merged, store), store
+
+def run_single_station() -> Tuple[str, ObservationStore]:
+    """
+    Fetch the configured station and the Chao Phraya dam discharge and build
+    the single-station report (or an error message if data is missing).
+    """
     # Read water level and bank height for the configured station.  Environment
     # variables STATION_PROVINCE_CODE, STATION_TUMBON and STATION_NAME can
     # override the defaults defined above.
-    water_level, bank_level = get_sapphaya_data(
+    meta, observation = get_sapphaya_data(
         province_code=STATION_PROVINCE_CODE,
         target_tumbon=STATION_TUMBON,
         target_station_name=STATION_NAME,
@@ -616,21 +1012,36 @@ if __name__ == "__main__":
     # Read year 2565 data from the combined CSV if available
     hist_2565 = get_historical_from_csv(2565)
 
-    # --- Build Core Message ---
-    if water_level is not None and bank_level is not None and dam_discharge is not None:
+    store = ObservationStore.load(OBSERVATIONS_DIR)
+    if observation is not None:
+        record_local_observation(store, meta, observation, dam_discharge)
+    if dam_discharge is not None:
+        record_dam_discharge(store, dam_discharge, int(time.time()))
+
+    if observation is not None and dam_discharge is not None:
         # Pass 2567, 2565, 2554 historical values to the message creator
         core_message = analyze_and_create_message(
-            water_level,
+            meta,
+            observation,
             dam_discharge,
-            bank_level,
             hist_2567,
             hist_2565,
             hist_2554,
         )
     else:
-        station_status = "สำเร็จ" if water_level is not None else "ล้มเหลว"
+        station_status = "สำเร็จ" if observation is not None else "ล้มเหลว"
         discharge_status = "สำเร็จ" if dam_discharge is not None else "ล้มเหลว"
         core_message = create_error_message(station_status, discharge_status)
+    return core_message, store
+
+if __name__ == "__main__":
+    print("=== เริ่มการทำงานระบบแจ้งเตือนน้ำ (เวอร์ชันปรับปรุง) ===")
+
+    # --- Fetch Data and Build Core Message ---
+    if NATIONWIDE_MODE:
+        core_message, store = run_nationwide()
+    else:
+        core_message, store = run_single_station()
 
     # --- Assemble Final Message for LINE ---
     # The weather forecast section is intentionally removed per user request.
@@ -642,4 +1053,5 @@ if __name__ == "__main__":
     print(final_message)
     print("\n🚀 กำลังส่งข้อความไปยัง LINE...")
     send_line_broadcast(final_message)
+    update_dashboard(store)
     print("✅ เสร็จสิ้นการทำงาน")
@@ -0,0 +1,275 @@
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, NamedTuple, Set
+
+import numpy as np
+
+# Compact in-memory storage for station observations.  Each station keeps a
+# fixed-size ring buffer of (timestamp, level, discharge, flags) columns so
+# that weeks of 10-minute samples for thousands of stations fit in memory.
+# One sample costs 17 bytes (stored twice, see StationRingBuffer), i.e. about
+# 5 KB per station-day at 144 samples/day.
+
+# 14 days of 10-minute samples.
+DEFAULT_CAPACITY = 14 * 24 * 6
+
+
+@dataclass(slots=True, frozen=True)
+class StationMeta:
+    """Static description of a Thaiwater tele station."""
+
+    station_id: int
+    name: str
+    province: str
+    oldcode: str
+    bank_level: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} จ.{self.province}" if self.province else self.name
+
+
+@dataclass(slots=True, frozen=True)
+class Observation:
+    """
+    One reading of a station (epoch seconds, metres MSL, m³/s).  The
+    timestamp is None if the source time could not be parsed.
+    """
+
+    timestamp: int | None
+    level: float
+    discharge: float = math.nan
+
+
+class Window(NamedTuple):
+    """Zero-copy, oldest-first views over the most recent samples of a station."""
+
+    timestamp: np.ndarray
+    level: np.ndarray
+    discharge: np.ndarray
+    flags: np.ndarray
+
+
+class StationRingBuffer:
+    """
+    Fixed-size, array-backed ring buffer of observations for one station.
+
+    Every sample is written twice, at ``i`` and ``i + capacity``, so the last
+    ``n`` samples always form one contiguous slice.  `window` can therefore
+    return plain NumPy views (no copy, no re-ordering) to the trend and rule
+    evaluation code, at the cost of doubling the buffer size.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of samples retained; older samples are overwritten.
+    """
+
+    __slots__ = ("capacity", "_timestamp", "_level", "_discharge", "_flags", "_pos", "_size")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self._level = np.full(2 * capacity, np.nan, dtype=np.float32)
+        self._discharge = np.full(2 * capacity, np.nan, dtype=np.float32)
+        self._flags = np.zeros(2 * capacity, dtype=np.uint8)
+        self._pos = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamp.nbytes + self._level.nbytes + self._discharge.nbytes + self._flags.nbytes
+
+    @property
+    def last_timestamp(self) -> int | None:
+        if not self._size:
+            return None
+        return int(self._timestamp[self._pos + self.capacity - 1])
+
+    def append(self, timestamp: int, level: float, discharge: float = math.nan, flags: int = 0) -> bool:
+        """
+        Append one sample.  Samples that are not newer than the last stored
+        one (e.g. the same reading seen on two consecutive polls) are ignored.
+
+        Returns
+        -------
+        bool
+            True if the sample was stored.
+        """
+        last = self.last_timestamp
+        if last is not None and timestamp <= last:
+            return False
+        for i in (self._pos, self._pos + self.capacity):
+            self._timestamp[i] = timestamp
+            self._level[i] = level
+            self._discharge[i] = discharge
+            self._flags[i] = flags
+        self._pos = (self._pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return True
+
+    def extend(self, timestamp: np.ndarray, level: np.ndarray, discharge: np.ndarray, flags: np.ndarray) -> int:
+        """
+        Vectorised `append` for oldest-first columns.  Samples not newer than
+        the last stored one are dropped.  Returns the number of samples stored.
+        """
+        timestamp = np.asarray(timestamp, dtype=np.int64)
+        last = self.last_timestamp
+        keep = np.ones(len(timestamp), dtype=bool) if last is None else timestamp > last
+        columns = [
+            (self._timestamp, timestamp[keep]),
+            (self._level, np.asarray(level)[keep]),
+            (self._discharge, np.asarray(discharge)[keep]),
+            (self._flags, np.asarray(flags)[keep]),
+        ]
+        n = int(np.count_nonzero(keep))
+        tail = min(n, self.capacity)
+        idx = (self._pos + (n - tail) + np.arange(tail)) % self.capacity
+        for dest, src in columns:
+            dest[idx] = src[n - tail:]
+            dest[idx + self.capacity] = src[n - tail:]
+        self._pos = (self._pos + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+        return n
+
+    def window(self, n: int | None = None) -> Window:
+        """Return views over the last `n` samples (all stored samples if None)."""
+        n = self._size if n is None else max(0, min(n, self._size))
+        end = self._pos + self.capacity
+        sl = slice(end - n, end)
+        return Window(self._timestamp[sl], self._level[sl], self._discharge[sl], self._flags[sl])
+
+    def since(self, timestamp: int) -> Window:
+        """Return views over the samples strictly newer than `timestamp`."""
+        ts = self.window().timestamp
+        return self.window(len(ts) - int(np.searchsorted(ts, timestamp, side="right")))
+
+
+def level_trend(window: Window) -> float:
+    """
+    Least-squares slope of the water level over `window`, in metres per hour.
+    Returns NaN if fewer than two valid samples are available.
+    """
+    valid = ~np.isnan(window.level)
+    if np.count_nonzero(valid) < 2:
+        return math.nan
+    hours = (window.timestamp[valid] - window.timestamp[valid][0]) / 3600.0
+    if hours[-1] <= 0:
+        return math.nan
+    slope, _ = np.polyfit(hours, window.level[valid].astype(np.float64), 1)
+    return float(slope)
+
+
+class ObservationStore:
+    """
+    Station metadata plus one ring buffer per station, keyed by station id.
+
+    Stations that received new samples since the last `save` are tracked in
+    `changed` so that only their files are rewritten.
+    """
+
+    __slots__ = ("capacity", "meta", "buffers", "changed")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.meta: Dict[int, StationMeta] = {}
+        self.buffers: Dict[int, StationRingBuffer] = {}
+        self.changed: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.buffers)
+
+    def buffer(self, station_id: int) -> StationRingBuffer:
+        buf = self.buffers.get(station_id)
+        if buf is None:
+            buf = self.buffers[station_id] = StationRingBuffer(self.capacity)
+        return buf
+
+    def ingest(self, merged: Dict[str, object]) -> int:
+        """
+        Append a columnar poll result (see `main.merge_shard_results`) to the
+        per-station buffers.  Returns the number of new samples stored.
+        """
+        self.meta.update(merged["stations"])
+        stored = 0
+        for station_id, ts, level, discharge, alert in zip(
+            merged["station_id"],
+            merged["timestamp"],
+            merged["water_level"],
+            merged["discharge"],
+            merged["alert"],
+        ):
+            stored += self.append(station_id, ts, level, discharge, alert)
+        return stored
+
+    def append(self, station_id: int, timestamp: int, level: float, discharge: float = math.nan, flags: int = 0) -> bool:
+        """Append one sample to a station's buffer, marking it as changed."""
+        if self.buffer(station_id).append(timestamp, level, discharge, flags):
+            self.changed.add(station_id)
+            return True
+        return False
+
+    def save(self, directory: str) -> int:
+        """
+        Write every changed station to ``<directory>/<station_id>.npz``
+        (oldest-first columns plus metadata).  Returns the number of files
+        written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = 0
+        for station_id in sorted(self.changed):
+            window = self.buffers[station_id].window()
+            meta = self.meta.get(station_id)
+            meta_fields = {f"meta_{k}": v for k, v in asdict(meta).items()} if meta else {}
+            np.savez(
+                os.path.join(directory, f"{station_id}.npz"),
+                timestamp=window.timestamp,
+                level=window.level,
+                discharge=window.discharge,
+                flags=window.flags,
+                **meta_fields,
+            )
+            written += 1
+        self.changed.clear()
+        return written
+
+    @classmethod
+    def load(cls, directory: str, capacity: int = DEFAULT_CAPACITY) -> "ObservationStore":
+        """
+        Load a store previously written by `save`.  A missing directory
+        yields an empty store; unreadable files are skipped with a warning.
+        """
+        store = cls(capacity)
+        if not os.path.isdir(directory):
+            return store
+        for file_name in os.listdir(directory):
+            station_key, ext = os.path.splitext(file_name)
+            if ext != ".npz" or not station_key.lstrip("-").isdigit():
+                continue
+            station_id = int(station_key)
+            try:
+                with np.load(os.path.join(directory, file_name)) as data:
+                    store.buffer(station_id).extend(
+                        data["timestamp"], data["level"], data["discharge"], data["flags"]
+                    )
+                    if "meta_name" in data:
+                        store.meta[station_id] = StationMeta(
+                            station_id=station_id,
+                            name=str(data["meta_name"]),
+                            province=str(data["meta_province"]),
+                            oldcode=str(data["meta_oldcode"]),
+                            bank_level=float(data["meta_bank_level"]),
+                        )
+            except Exception as e:
+                print(f"⚠️ ไม่สามารถโหลดข้อมูลสถานีจาก {file_name}: {e}")
+        return store
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self.buffers.values())
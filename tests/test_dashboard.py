@@ -0,0 +1,112 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from dashboard import (
+    MAX_POINTS_PER_CHUNK,
+    _month_keys,
+    _read_chunk,
+    build_dashboard,
+    build_month_chunk,
+    downsample,
+    lttb,
+)
+from observations import ObservationStore, StationMeta, StationRingBuffer
+
+# 2025-01-01 00:00 Asia/Bangkok.
+JAN_START = 1735664400
+STEP = 600
+
+
+@pytest.mark.parametrize("n,threshold", [(10, 3), (100, 10), (101, 7), (1000, 500), (4464, 500)])
+def test_lttb_keeps_edges_and_returns_threshold_unique_indices(n, threshold):
+    x = np.arange(n, dtype=float)
+    y = np.sin(x / 7.0)
+    idx = lttb(x, y, threshold)
+    assert len(idx) == threshold
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+@pytest.mark.parametrize("n,threshold", [(5, 5), (5, 9), (50, 2), (50, 0), (0, 10)])
+def test_lttb_returns_everything_below_threshold_or_for_tiny_thresholds(n, threshold):
+    x = np.arange(n, dtype=float)
+    assert list(lttb(x, x, threshold)) == list(range(n))
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[537] = 10.0
+    assert 537 in lttb(np.arange(1000.0), y, 20)
+
+
+def test_downsample_returns_original_pairs():
+    points = [[i, float(i % 13)] for i in range(200)]
+    assert downsample(points, 500) is points
+    thinned = downsample(points, 20)
+    assert len(thinned) == 20
+    assert all(p in points for p in thinned)
+
+
+def test_month_keys_use_bangkok_time():
+    keys = _month_keys(np.array([JAN_START - 1, JAN_START, JAN_START + 31 * 86400 - 1]))
+    assert list(keys) == ["2024-12", "2025-01", "2025-01"]
+
+
+def _fill(buf, start, end):
+    for t in range(start, end, STEP):
+        buf.append(t, 10.0 + math.sin(t / 5000.0), 1000.0 + (t % 7200) / 10.0)
+
+
+def test_month_chunk_freezes_points_evicted_from_the_buffer(tmp_path):
+    path = str(tmp_path / "2025-01.js")
+    buf = StationRingBuffer(capacity=3 * 144)  # three days
+    _fill(buf, JAN_START, JAN_START + 5 * 86400)
+    build_month_chunk(buf, "2025-01", path)
+    first = _read_chunk(path)
+    # Two more days: the first four days are no longer in the buffer.
+    _fill(buf, JAN_START + 5 * 86400, JAN_START + 7 * 86400)
+    build_month_chunk(buf, "2025-01", path)
+    second = _read_chunk(path)
+    evicted = int(buf.window().timestamp[0])
+    for key in ("level", "discharge"):
+        old = [p for p in first[key] if p[0] < evicted]
+        assert old and [p for p in second[key] if p[0] < evicted] == old
+        assert [p[0] for p in second[key]] == sorted({p[0] for p in second[key]})
+    assert second["level"][-1][0] == buf.last_timestamp
+
+
+def test_month_chunk_stays_near_budget_over_a_whole_month(tmp_path):
+    path = str(tmp_path / "2025-01.js")
+    buf = StationRingBuffer(capacity=3 * 144)
+    for day in range(31):
+        _fill(buf, JAN_START + day * 86400, JAN_START + (day + 1) * 86400)
+        build_month_chunk(buf, "2025-01", path)
+    chunk = _read_chunk(path)
+    assert chunk["month"] == "2025-01"
+    assert MAX_POINTS_PER_CHUNK * 0.9 <= len(chunk["level"]) <= MAX_POINTS_PER_CHUNK * 1.1
+    assert chunk["level"][0][0] == JAN_START
+
+
+def test_build_dashboard_only_rebuilds_stations_with_new_samples(tmp_path):
+    out = str(tmp_path / "dashboard")
+    csv_path = str(tmp_path / "missing.csv")
+    store = ObservationStore(capacity=50)
+    store.meta[1] = StationMeta(1, "a", "p", "C.1", 13.0)
+    store.meta[2] = StationMeta(2, "b", "p", "C.2", math.nan)
+    store.append(1, JAN_START, 10.0, math.nan, 0)
+    store.append(2, JAN_START, 5.0, math.nan, 3)
+    assert build_dashboard(store, out, csv_path) == 2
+    assert build_dashboard(store, out, csv_path) == 0
+    store.append(2, JAN_START + STEP, 5.5, math.nan, 3)
+    assert build_dashboard(store, out, csv_path) == 1
+    with open(os.path.join(out, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["1"]["rendered_until"] == JAN_START
+    assert manifest["2"]["rendered_until"] == JAN_START + STEP
+    assert manifest["2"]["bank_level"] is None
+    assert manifest["2"]["months"] == ["2025-01"]
+    assert os.path.exists(os.path.join(out, "data", "2", "2025-01.js"))
@@ -0,0 +1,106 @@
+import math
+from array import array
+
+import main
+from observations import StationMeta
+
+
+def _shard(rows):
+    """Build a columnar shard result from (station_id, timestamp, level) rows."""
+    shard = {
+        "station_id": array('q'),
+        "timestamp": array('q'),
+        "water_level": array('d'),
+        "bank_level": array('d'),
+        "discharge": array('d'),
+        "alert": array('b'),
+        "stations": {},
+    }
+    for station_id, ts, level in rows:
+        shard["station_id"].append(station_id)
+        shard["timestamp"].append(ts)
+        shard["water_level"].append(level)
+        shard["bank_level"].append(13.0)
+        shard["discharge"].append(math.nan)
+        shard["alert"].append(main.classify_station(level, 13.0))
+        shard["stations"][station_id] = StationMeta(station_id, f"S{station_id}", "P", "", 13.0)
+    return shard
+
+
+def _by_station(merged):
+    return {
+        sid: (ts, level)
+        for sid, ts, level in zip(merged["station_id"], merged["timestamp"], merged["water_level"])
+    }
+
+
+def test_merge_keeps_newest_reading_across_shards():
+    merged = main.merge_shard_results([
+        _shard([(1, 100, 10.0), (2, 100, 11.0)]),
+        _shard([(1, 200, 12.5), (3, 100, 9.0)]),
+        _shard([(1, 150, 11.5)]),
+    ])
+    assert _by_station(merged) == {1: (200, 12.5), 2: (100, 11.0), 3: (100, 9.0)}
+    assert set(merged["stations"]) == {1, 2, 3}
+    row = list(merged["station_id"]).index(1)
+    assert merged["alert"][row] == main.ALERT_CRITICAL
+
+
+def test_merge_keeps_first_reading_on_equal_timestamps():
+    merged = main.merge_shard_results([
+        _shard([(1, 100, 10.0)]),
+        _shard([(1, 100, 12.0)]),
+    ])
+    assert _by_station(merged) == {1: (100, 10.0)}
+
+
+def test_merge_dedups_within_a_shard():
+    merged = main.merge_shard_results([_shard([(1, 300, 10.0), (1, 100, 11.0)])])
+    assert _by_station(merged) == {1: (300, 10.0)}
+
+
+def test_merge_of_no_shards_is_empty():
+    merged = main.merge_shard_results([])
+    assert len(merged["station_id"]) == 0
+    assert merged["stations"] == {}
+
+
+def test_poll_shard_skips_unknown_time_and_keeps_unknown_bank(monkeypatch):
+    items = [
+        {"station": {"id": 1, "min_bank": "13"}, "waterlevel_msl": "12.5", "waterlevel_datetime": "2025-09-01 10:00"},
+        {"station": {"id": 2}, "waterlevel_msl": "10", "waterlevel_datetime": "2025-09-01 10:00"},
+        {"station": {"id": 3, "min_bank": "13"}, "waterlevel_msl": "10", "waterlevel_datetime": None},
+        {"station": {"id": 4, "min_bank": "13"}, "waterlevel_msl": "10", "waterlevel_datetime": "bad"},
+        {"station": {"min_bank": "13"}, "waterlevel_msl": "10", "waterlevel_datetime": "2025-09-01 10:00"},
+    ]
+    monkeypatch.setattr(main, "fetch_province_waterlevels", lambda code: items)
+    shard = main.poll_province_shard(("10",))
+    assert list(shard["station_id"]) == [1, 2]
+    assert list(shard["alert"]) == [main.ALERT_CRITICAL, main.ALERT_UNKNOWN]
+    assert math.isnan(shard["bank_level"][1])
+
+
+def test_local_alert_combines_bank_distance_and_dam_discharge():
+    assert main.classify_local_station(10.0, 13.0, 1000.0) == main.ALERT_NORMAL
+    assert main.classify_local_station(10.0, 13.0, 2000.0) == main.ALERT_WATCH
+    assert main.classify_local_station(10.0, 13.0, 2500.0) == main.ALERT_CRITICAL
+    assert main.classify_local_station(12.5, 13.0, None) == main.ALERT_CRITICAL
+    assert main.classify_local_station(12.5, 13.0, 2000.0) == main.ALERT_CRITICAL
+    assert main.classify_local_station(10.0, math.nan, None) == main.ALERT_UNKNOWN
+    assert main.classify_local_station(10.0, math.nan, 2000.0) == main.ALERT_WATCH
+
+
+def test_dam_discharge_is_stored_as_its_own_series():
+    store = main.ObservationStore(capacity=5)
+    meta = StationMeta(7, "x", "y", "S.1", 13.0)
+    observation = main.Observation(timestamp=100, level=10.0)
+    assert main.record_local_observation(store, meta, observation, 2500.0)
+    assert main.record_dam_discharge(store, 2500.0, 200)
+    local = store.buffers[7].window()
+    assert math.isnan(local.discharge[0])
+    assert local.flags[0] == main.ALERT_CRITICAL
+    dam = store.buffers[main.DAM_SERIES_ID].window()
+    assert list(dam.discharge) == [2500.0]
+    assert math.isnan(dam.level[0])
+    assert dam.flags[0] == main.ALERT_CRITICAL
+    assert math.isnan(store.meta[main.DAM_SERIES_ID].bank_level)
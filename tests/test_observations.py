@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+from observations import ObservationStore, StationMeta, StationRingBuffer, level_trend
+
+
+def _filled(capacity, timestamps):
+    buf = StationRingBuffer(capacity)
+    for t in timestamps:
+        buf.append(int(t), float(t))
+    return buf
+
+
+@pytest.mark.parametrize("n", [0, 1, 4, 5, 6, 13])
+def test_window_is_ordered_view_after_wraparound(n):
+    buf = _filled(5, range(1, n + 1))
+    window = buf.window()
+    expected = list(range(max(1, n - 4), n + 1)) if n else []
+    assert list(window.timestamp) == expected
+    assert list(window.level) == expected
+    assert np.shares_memory(window.level, buf._level) or not n
+    assert len(buf) == min(n, 5)
+    assert buf.last_timestamp == (n if n else None)
+
+
+def test_window_n_is_clamped_and_takes_newest():
+    buf = _filled(5, range(1, 9))
+    assert list(buf.window(2).timestamp) == [7, 8]
+    assert list(buf.window(50).timestamp) == [4, 5, 6, 7, 8]
+    assert len(buf.window(0).timestamp) == 0
+
+
+def test_append_ignores_samples_not_newer_than_last():
+    buf = _filled(5, [10, 20])
+    assert buf.append(20, 1.0) is False
+    assert buf.append(15, 1.0) is False
+    assert buf.append(21, 1.0) is True
+    assert list(buf.window().timestamp) == [10, 20, 21]
+
+
+@pytest.mark.parametrize("existing,added", [(0, 3), (2, 9), (4, 2), (0, 12), (3, 5), (5, 0)])
+def test_extend_matches_repeated_append(existing, added):
+    by_append = _filled(5, range(1, existing + 1))
+    by_extend = _filled(5, range(1, existing + 1))
+    ts = np.arange(existing + 1, existing + 1 + added)
+    for t in ts:
+        by_append.append(int(t), float(t))
+    stored = by_extend.extend(ts, ts.astype(float), np.full(added, np.nan), np.zeros(added))
+    assert stored == added
+    assert list(by_extend.window().timestamp) == list(by_append.window().timestamp)
+    assert list(by_extend.window().level) == list(by_append.window().level)
+    assert by_extend._pos == by_append._pos
+    # Both mirrored halves must agree, otherwise later windows would be wrong.
+    np.testing.assert_array_equal(by_extend._timestamp[:5], by_extend._timestamp[5:])
+
+
+def test_extend_drops_samples_not_newer_than_last():
+    buf = _filled(5, [1, 2, 3])
+    ts = np.array([2, 3, 4, 5])
+    assert buf.extend(ts, ts.astype(float), np.full(4, np.nan), np.zeros(4)) == 2
+    assert list(buf.window().timestamp) == [1, 2, 3, 4, 5]
+
+
+def test_since_is_strictly_newer():
+    buf = _filled(5, range(1, 9))
+    assert list(buf.since(6).timestamp) == [7, 8]
+    assert list(buf.since(0).timestamp) == [4, 5, 6, 7, 8]
+    assert len(buf.since(8).timestamp) == 0
+
+
+def test_level_trend():
+    buf = StationRingBuffer(10)
+    for hour in range(4):
+        buf.append(hour * 3600, 10.0 + 0.5 * hour)
+    assert level_trend(buf.window()) == pytest.approx(0.5)
+    assert math.isnan(level_trend(buf.window(1)))
+
+
+def test_store_save_load_round_trip(tmp_path):
+    store = ObservationStore(capacity=5)
+    store.meta[3] = StationMeta(3, "x", "y", "C.1", 10.0)
+    for t in range(1, 9):
+        store.append(3, t, float(t), 100.0, 1)
+    store.append(-1, 1, math.nan, 2500.0, 2)
+    assert store.save(str(tmp_path)) == 2
+    assert store.changed == set()
+    loaded = ObservationStore.load(str(tmp_path), capacity=5)
+    assert loaded.meta[3] == store.meta[3]
+    assert list(loaded.buffers[3].window().timestamp) == [4, 5, 6, 7, 8]
+    assert list(loaded.buffers[-1].window().discharge) == [2500.0]
+    assert loaded.changed == set()